@@ -4,62 +4,111 @@ Fault Line - Article Classification Pipeline
 Classifies articles by lab, dimension, and impact direction.
 """
 
+import hashlib
 import json
 import re
-import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+import ahocorasick
+import orjson
 import yaml
 
+WHITESPACE_RE = re.compile(r"\s+")
+
 
 class ArticleClassifier:
     """Classifies articles using keyword matching and rules."""
     
+    # Config sections holding keyword lists
+    PATTERN_GROUPS = ("lab_patterns", "dimension_patterns", "impact_patterns")
+    
+    # Common tag patterns
+    TAG_KEYWORDS = [
+        "partnership", "funding", "valuation", "regulation", "antitrust",
+        "gpu", "nvidia", "tpu", "azure", "aws", "gcp", "infrastructure",
+        "safety", "compliance", "revenue", "growth", "layoff"
+    ]
+    
     def __init__(self, config_path: str = "sources.yaml"):
         self.config_path = Path(config_path)
         self.config = self._load_config()
         self.checklist = self._load_checklist()
+        self.automaton = self._build_automaton()
         
     def _load_config(self) -> dict:
         """Load classification patterns from config."""
         with open(self.config_path) as f:
-            return yaml.safe_load(f)
+            config = yaml.safe_load(f)
+        
+        # Lowercase keywords once so matching never has to
+        for group in self.PATTERN_GROUPS:
+            patterns = config.get(group) or {}
+            for key, keywords in patterns.items():
+                patterns[key] = [keyword.lower() for keyword in keywords]
+        
+        return config
     
     def _load_checklist(self) -> dict:
         """Load checklist definitions."""
         checklist_path = Path(__file__).parent.parent / "docs" / "data" / "checklist.json"
         if checklist_path.exists():
-            with open(checklist_path) as f:
-                return json.load(f)
+            with open(checklist_path, "rb") as f:
+                checklist = orjson.loads(f.read())
+            for item in checklist.get("checklist_items", []):
+                item["keywords"] = [keyword.lower() for keyword in item.get("keywords", [])]
+            return checklist
         return {"checklist_items": []}
     
+    def _build_automaton(self) -> ahocorasick.Automaton:
+        """Build one Aho-Corasick automaton over every classification keyword."""
+        keywords = set(self.TAG_KEYWORDS)
+        for group in self.PATTERN_GROUPS:
+            for group_keywords in self.config.get(group, {}).values():
+                keywords.update(group_keywords)
+        for item in self.checklist.get("checklist_items", []):
+            keywords.update(item["keywords"])
+        
+        automaton = ahocorasick.Automaton()
+        for keyword in keywords:
+            if keyword:
+                automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return automaton
+    
+    def _match_keywords(self, text: str) -> set[str]:
+        """Return every known keyword occurring in text, found in a single scan."""
+        if self.automaton.kind != ahocorasick.AHOCORASICK:
+            return set()  # No keywords configured
+        return {keyword for _, keyword in self.automaton.iter(text)}
+    
     def classify_article(self, article: dict) -> Optional[dict]:
         """Classify a single article into an event."""
         text = f"{article.get('title', '')} {article.get('summary', '')}".lower()
+        matched = self._match_keywords(text)
         
         # Identify lab(s)
-        labs = self._identify_labs(text)
+        labs = self._identify_labs(matched)
         if not labs:
             return None  # Skip articles not about our tracked labs
         
         # Identify dimension
-        dimension = self._identify_dimension(text)
+        dimension = self._identify_dimension(matched)
         if not dimension:
             return None  # Skip articles we can't categorize
         
         # Determine impact
-        impact = self._determine_impact(text, dimension)
+        impact = self._determine_impact(matched, dimension)
         
         # Map to checklist items
-        checklist_items = self._map_to_checklist(text, dimension, impact)
+        checklist_items = self._map_to_checklist(matched, dimension, impact)
         
         # Create event for each lab mentioned
         events = []
         for lab in labs:
             event = {
-                "id": f"evt-{uuid.uuid4().hex[:8]}",
+                "id": self._generate_event_id(article, lab, dimension),
                 "date": article.get("date", datetime.now().isoformat())[:10],
                 "lab": lab,
                 "dimension": dimension,
@@ -68,48 +117,48 @@ class ArticleClassifier:
                 "source_name": article.get("source_name", "Unknown"),
                 "impact": impact,
                 "checklist_items_affected": checklist_items,
-                "confidence": self._assess_confidence(text, labs, dimension),
-                "tags": self._extract_tags(text),
+                "confidence": self._assess_confidence(matched, labs, dimension),
+                "tags": self._extract_tags(matched),
                 "auto_classified": True,
             }
             events.append(event)
         
         return events[0] if len(events) == 1 else events
     
-    def _identify_labs(self, text: str) -> list[str]:
-        """Identify which labs are mentioned in text."""
+    def _generate_event_id(self, article: dict, lab: str, dimension: str) -> str:
+        """Generate deterministic event ID so re-runs reproduce the same IDs."""
+        key = f"{article.get('url', '')}|{lab}|{dimension}"
+        return "evt-" + hashlib.blake2b(key.encode("utf-8"), digest_size=4).hexdigest()
+    
+    def _identify_labs(self, matched: set[str]) -> list[str]:
+        """Identify which labs are mentioned, given the article's matched keywords."""
         labs = []
         patterns = self.config.get("lab_patterns", {})
         
         for lab_id, keywords in patterns.items():
             for keyword in keywords:
-                if keyword.lower() in text:
+                if keyword in matched:
                     if lab_id not in labs:
                         labs.append(lab_id)
                     break
         
         return labs
     
-    def _identify_dimension(self, text: str) -> Optional[str]:
+    def _identify_dimension(self, matched: set[str]) -> Optional[str]:
         """Identify the primary dimension of the article."""
         patterns = self.config.get("dimension_patterns", {})
-        scores = {}
         
+        # Track the dimension with highest score; ties go to the first listed
+        best_dimension = None
+        best_score = 0
         for dimension, keywords in patterns.items():
-            score = 0
-            for keyword in keywords:
-                if keyword.lower() in text:
-                    score += 1
-            if score > 0:
-                scores[dimension] = score
-        
-        if not scores:
-            return None
+            score = sum(1 for keyword in keywords if keyword in matched)
+            if score > best_score:
+                best_dimension, best_score = dimension, score
         
-        # Return dimension with highest score
-        return max(scores, key=scores.get)
+        return best_dimension
     
-    def _determine_impact(self, text: str, dimension: str) -> int:
+    def _determine_impact(self, matched: set[str], dimension: str) -> int:
         """Determine if article indicates increased or decreased fragility."""
         patterns = self.config.get("impact_patterns", {})
         
@@ -117,11 +166,11 @@ class ArticleClassifier:
         negative_score = 0  # Decreases fragility
         
         for keyword in patterns.get("positive_fragility", []):
-            if keyword.lower() in text:
+            if keyword in matched:
                 positive_score += 1
         
         for keyword in patterns.get("negative_fragility", []):
-            if keyword.lower() in text:
+            if keyword in matched:
                 negative_score += 1
         
         # Resilience dimension has inverted logic
@@ -135,7 +184,7 @@ class ArticleClassifier:
         else:
             return 0
     
-    def _map_to_checklist(self, text: str, dimension: str, impact: int) -> list[str]:
+    def _map_to_checklist(self, matched: set[str], dimension: str, impact: int) -> list[str]:
         """Map article to specific checklist items."""
         items = []
         
@@ -146,7 +195,7 @@ class ArticleClassifier:
             # Check if any keywords match
             keywords = item.get("keywords", [])
             for keyword in keywords:
-                if keyword.lower() in text:
+                if keyword in matched:
                     items.append(item["id"])
                     break
         
@@ -157,19 +206,19 @@ class ArticleClassifier:
         title = article.get("title", "")
         
         # Clean and truncate
-        summary = re.sub(r"\s+", " ", title).strip()
+        summary = WHITESPACE_RE.sub(" ", title).strip()
         if len(summary) > 200:
             summary = summary[:197] + "..."
         
         return summary
     
-    def _assess_confidence(self, text: str, labs: list, dimension: str) -> str:
+    def _assess_confidence(self, matched: set[str], labs: list, dimension: str) -> str:
         """Assess classification confidence."""
         # Simple heuristic: more keyword matches = higher confidence
         lab_matches = len(labs)
         
         dim_patterns = self.config.get("dimension_patterns", {}).get(dimension, [])
-        dim_matches = sum(1 for k in dim_patterns if k.lower() in text)
+        dim_matches = sum(1 for k in dim_patterns if k in matched)
         
         if lab_matches >= 2 and dim_matches >= 3:
             return "high"
@@ -178,27 +227,20 @@ class ArticleClassifier:
         else:
             return "low"
     
-    def _extract_tags(self, text: str) -> list[str]:
-        """Extract relevant tags from text."""
+    def _extract_tags(self, matched: set[str]) -> list[str]:
+        """Extract relevant tags from the article's matched keywords."""
         tags = []
         
-        # Common tag patterns
-        tag_keywords = [
-            "partnership", "funding", "valuation", "regulation", "antitrust",
-            "gpu", "nvidia", "tpu", "azure", "aws", "gcp", "infrastructure",
-            "safety", "compliance", "revenue", "growth", "layoff"
-        ]
-        
-        for keyword in tag_keywords:
-            if keyword in text:
+        for keyword in self.TAG_KEYWORDS:
+            if keyword in matched:
                 tags.append(keyword)
         
         return tags[:5]  # Limit to 5 tags
     
     def process_articles(self, articles_path: str = "raw_articles.json") -> list[dict]:
         """Process all articles and return classified events."""
-        with open(articles_path) as f:
-            data = json.load(f)
+        with open(articles_path, "rb") as f:
+            data = orjson.loads(f.read())
         
         articles = data.get("articles", [])
         events = []
@@ -225,8 +267,8 @@ class ArticleClassifier:
         existing_path = Path(existing_path)
 
         if existing_path.exists():
-            with open(existing_path) as f:
-                existing_data = json.load(f)
+            with open(existing_path, "rb") as f:
+                existing_data = orjson.loads(f.read())
             existing_events = existing_data.get("events", [])
         else:
             existing_events = []
@@ -236,35 +278,38 @@ class ArticleClassifier:
         existing_urls = {e.get("source_url") for e in existing_events}
         existing_ids = {e.get("id") for e in existing_events}
 
-        # Add only truly new events (not historical events)
-        added = 0
+        # Collect only truly new events (not historical events) in one pass
+        new_unique = []
         for event in new_events:
-            # Skip if URL already exists
-            if event.get("source_url") in existing_urls:
-                continue
-            # Skip if ID already exists (shouldn't happen with UUIDs but safety check)
-            if event.get("id") in existing_ids:
+            source_url = event.get("source_url")
+            event_id = event.get("id")
+            # Skip if URL or ID already exists (IDs are derived from URL, lab and dimension)
+            if source_url in existing_urls or event_id in existing_ids:
                 continue
 
-            # Mark live-ingested events explicitly as not historical
-            event["historical"] = False
+            existing_urls.add(source_url)
+            existing_ids.add(event_id)
+            new_unique.append(event)
 
-            existing_events.append(event)
-            existing_urls.add(event.get("source_url"))
-            existing_ids.add(event.get("id"))
-            added += 1
+        # Mark live-ingested events explicitly as not historical
+        for event in new_unique:
+            event["historical"] = False
+        existing_events.extend(new_unique)
 
-        print(f"Added {added} new events")
+        print(f"Added {len(new_unique)} new events")
 
         # Sort by date for consistency
         existing_events.sort(key=lambda x: x.get("date", ""))
 
         return existing_events
     
-    def save_events(self, events: list[dict], output_path: str):
-        """Save events to JSON file."""
-        with open(output_path, "w") as f:
-            json.dump({"events": events}, f, indent=2)
+    def save_events(self, events: list[dict], output_path: str, pretty: bool = False):
+        """Save events to JSON file (compact unless pretty is set)."""
+        with open(output_path, "w", encoding="utf-8") as f:
+            if pretty:
+                json.dump({"events": events}, f, indent=2, ensure_ascii=False)
+            else:
+                json.dump({"events": events}, f, separators=(",", ":"), ensure_ascii=False)
         print(f"Saved {len(events)} events to {output_path}")
 
 
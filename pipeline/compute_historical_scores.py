@@ -6,9 +6,18 @@ Computes monthly fragility score snapshots from all events.
 
 import json
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from collections import defaultdict
-from typing import Optional
+from collections import Counter, defaultdict, deque
+
+import orjson
+from dateutil.rrule import MONTHLY, rrule
+
+
+@lru_cache(maxsize=None)
+def _parse_date(value: str) -> datetime:
+    """Parse a YYYY-MM-DD date string, memoized across snapshots."""
+    return datetime.strptime(value, "%Y-%m-%d")
 
 
 class HistoricalScoreCalculator:
@@ -30,85 +39,107 @@ class HistoricalScoreCalculator:
     def __init__(self, events_path: str, checklist_path: str):
         self.events = self._load_events(events_path)
         self.checklist = self._load_checklist(checklist_path)
+        self.item_dimensions, self.item_points = self._index_checklist(self.checklist)
+        self.events_by_lab, self.date_keys_by_lab = self._index_events_by_lab(self.events)
 
     def _load_events(self, path: str) -> list:
         """Load events from JSON file."""
-        with open(path) as f:
-            data = json.load(f)
-        return sorted(data.get("events", []), key=lambda x: x.get("date", ""))
+        with open(path, "rb") as f:
+            data = orjson.loads(f.read())
+        events = data.get("events", [])
+
+        # Parse each event date once rather than on every window lookup
+        for event in events:
+            event["_date_dt"] = _parse_date(event.get("date", "2099-01-01"))
+
+        # Sort on the parsed date so undated events (2099) land at the end
+        return sorted(events, key=lambda x: x["_date_dt"])
+
+    def _index_events_by_lab(self, events: list) -> tuple[dict, dict]:
+        """Group date-sorted events by lab, with a parallel list of their dates."""
+        events_by_lab = defaultdict(list)
+        date_keys_by_lab = defaultdict(list)
+        for event in events:
+            lab = event.get("lab")
+            events_by_lab[lab].append(event)
+            date_keys_by_lab[lab].append(event["_date_dt"])
+        return events_by_lab, date_keys_by_lab
 
     def _load_checklist(self, path: str) -> dict:
         """Load checklist definitions."""
-        with open(path) as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+
+    def _index_checklist(self, checklist: dict) -> tuple[dict, dict]:
+        """Build item_id -> dimension and item_id -> points lookup tables."""
+        item_dimensions = {}
+        item_points = {}
+        for item in checklist.get("checklist_items", []):
+            item_id = item.get("id")
+            if item_id in item_dimensions:
+                continue  # First definition wins
+            item_dimensions[item_id] = item.get("dimension")
+            item_points[item_id] = abs(item.get("points", 1))
+        return item_dimensions, item_points
 
     def _get_month_end_dates(self, start_date: str, end_date: str) -> list:
         """Generate list of month-end dates between start and end."""
-        dates = []
-        current = datetime.strptime(start_date, "%Y-%m-%d")
+        start = datetime.strptime(start_date, "%Y-%m-%d")
         end = datetime.strptime(end_date, "%Y-%m-%d")
 
-        while current <= end:
-            # Get last day of month
-            if current.month == 12:
-                month_end = current.replace(day=31)
-            else:
-                next_month = current.replace(month=current.month + 1, day=1)
-                month_end = next_month - timedelta(days=1)
+        # bymonthday=-1 is the last day of each month; both bounds are inclusive
+        month_ends = rrule(MONTHLY, dtstart=start, until=end, bymonthday=-1)
+        return [month_end.strftime("%Y-%m-%d") for month_end in month_ends]
 
-            if month_end <= end:
-                dates.append(month_end.strftime("%Y-%m-%d"))
-
-            # Move to next month
-            if current.month == 12:
-                current = current.replace(year=current.year + 1, month=1, day=1)
-            else:
-                current = current.replace(month=current.month + 1, day=1)
-
-        return dates
-
-    def _get_events_in_window(self, snapshot_date: str, lab: str) -> list:
-        """Get events within decay window before snapshot date."""
-        snapshot_dt = datetime.strptime(snapshot_date, "%Y-%m-%d")
-        window_start = snapshot_dt - timedelta(days=self.DECAY_WINDOW_DAYS)
+    def _new_window_state(self) -> dict:
+        """Create the sliding decay-window state for one lab."""
+        return {
+            "window": deque(),
+            "items_by_dim": defaultdict(Counter),
+            "next_idx": 0,
+        }
 
-        events_in_window = []
-        for event in self.events:
-            if event.get("lab") != lab:
+    def _count_event_items(self, items_by_dim: dict, event: dict, delta: int):
+        """Add (or remove) an event's checklist items to the per-dimension counts."""
+        dimension = event.get("dimension")
+        counts = items_by_dim[dimension]
+        for item_id in event.get("checklist_items_affected", []):
+            # Only count items that belong to the event's dimension in the checklist
+            if self.item_dimensions.get(item_id) != dimension:
                 continue
+            counts[item_id] += delta
+            if counts[item_id] == 0:
+                del counts[item_id]
 
-            event_date = datetime.strptime(event.get("date", "2099-01-01"), "%Y-%m-%d")
-            if window_start <= event_date <= snapshot_dt:
-                events_in_window.append(event)
+    def _advance_window(self, state: dict, snapshot_date: str, lab: str):
+        """Slide a lab's decay window forward to end at snapshot date.
 
-        return events_in_window
+        Snapshot dates must be visited in ascending order.
+        """
+        snapshot_dt = _parse_date(snapshot_date)
+        window_start = snapshot_dt - timedelta(days=self.DECAY_WINDOW_DAYS)
 
-    def _calculate_dimension_score(self, events: list, dimension: str) -> dict:
-        """Calculate score for a single dimension from events."""
-        # Get checklist items for this dimension
-        dim_items = [item for item in self.checklist.get("checklist_items", [])
-                     if item.get("dimension") == dimension]
+        keys = self.date_keys_by_lab[lab]
+        lab_events = self.events_by_lab[lab]
+        window = state["window"]
 
-        items_triggered = set()
+        # Push events up to the snapshot date
+        while state["next_idx"] < len(keys) and keys[state["next_idx"]] <= snapshot_dt:
+            event = lab_events[state["next_idx"]]
+            window.append(event)
+            self._count_event_items(state["items_by_dim"], event, 1)
+            state["next_idx"] += 1
 
-        for event in events:
-            if event.get("dimension") != dimension:
-                continue
+        # Drop events that have aged out of the window
+        while window and window[0]["_date_dt"] < window_start:
+            self._count_event_items(state["items_by_dim"], window.popleft(), -1)
 
-            for item_id in event.get("checklist_items_affected", []):
-                # Check if this item belongs to this dimension
-                for item in dim_items:
-                    if item.get("id") == item_id:
-                        items_triggered.add(item_id)
-                        break
+    def _calculate_dimension_score(self, item_counts: Counter) -> dict:
+        """Calculate score for a single dimension from its triggered item counts."""
+        items_triggered = item_counts.keys()
 
         # Calculate score based on triggered items
-        score = 0
-        for item_id in items_triggered:
-            for item in dim_items:
-                if item.get("id") == item_id:
-                    score += abs(item.get("points", 1))
-                    break
+        score = sum(self.item_points[item_id] for item_id in items_triggered)
 
         return {
             "score": min(score, 2),  # Cap at max 2 per dimension
@@ -116,18 +147,18 @@ class HistoricalScoreCalculator:
             "items_triggered": sorted(list(items_triggered))
         }
 
-    def _calculate_lab_score(self, snapshot_date: str, lab: str) -> Optional[dict]:
-        """Calculate fragility score for a lab at a snapshot date."""
-        # Check if lab exists at this date
-        founding = self.LAB_FOUNDING_DATES.get(lab)
-        if founding and snapshot_date < founding:
-            return None
+    def _calculate_lab_score(self, snapshot_date: str, lab: str, state: dict) -> dict:
+        """Calculate fragility score for a lab at a snapshot date.
 
-        events = self._get_events_in_window(snapshot_date, lab)
+        State is the lab's sliding window, which is advanced to snapshot date.
+        Callers skip snapshot dates before the lab's founding date.
+        """
+        self._advance_window(state, snapshot_date, lab)
+        events = state["window"]
 
         breakdown = {}
         for dim in self.DIMENSIONS:
-            breakdown[dim] = self._calculate_dimension_score(events, dim)
+            breakdown[dim] = self._calculate_dimension_score(state["items_by_dim"][dim])
 
         # Calculate total score
         # Formula: (Compute + Cloud + Policy + Demand) - Resilience
@@ -140,11 +171,9 @@ class HistoricalScoreCalculator:
         resilience = breakdown["resilience"]["score"]
         total_score = max(0, min(10, fragility_sum - resilience))
 
-        # Count events and get last event date
+        # Count events and get last event date (the window is date-sorted)
         events_count = len(events)
-        last_event_date = None
-        if events:
-            last_event_date = max(e.get("date") for e in events)
+        last_event_date = events[-1].get("date") if events else None
 
         return {
             "total_score": total_score,
@@ -226,11 +255,18 @@ class HistoricalScoreCalculator:
         print(f"Computing {len(month_ends)} monthly snapshots...")
         print(f"Date range: {start_date} to {end_date}")
 
+        # One sliding window per lab, advanced month by month
+        window_states = {lab: self._new_window_state() for lab in self.LABS}
+        # Labs have no score (None) before their founding date
+        founding_dates = {lab: self.LAB_FOUNDING_DATES.get(lab, "") for lab in self.LABS}
+
         snapshots = []
         for date in month_ends:
-            scores = {}
-            for lab in self.LABS:
-                scores[lab] = self._calculate_lab_score(date, lab)
+            scores = {
+                lab: (self._calculate_lab_score(date, lab, window_states[lab])
+                      if date >= founding_dates[lab] else None)
+                for lab in self.LABS
+            }
 
             snapshots.append({
                 "date": date,
@@ -250,10 +286,13 @@ class HistoricalScoreCalculator:
             "snapshots": snapshots
         }
 
-    def save(self, data: dict, output_path: str):
-        """Save historical scores to JSON file."""
-        with open(output_path, "w") as f:
-            json.dump(data, f, indent=2)
+    def save(self, data: dict, output_path: str, pretty: bool = False):
+        """Save historical scores to JSON file (compact unless pretty is set)."""
+        with open(output_path, "w", encoding="utf-8") as f:
+            if pretty:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            else:
+                json.dump(data, f, separators=(",", ":"), ensure_ascii=False)
         print(f"Saved to {output_path}")
 
 
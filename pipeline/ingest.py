@@ -6,50 +6,100 @@ Fetches articles from configured RSS feeds and normalizes them for classificatio
 
 import json
 import hashlib
-import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional
 from urllib.parse import urlparse
 
 import feedparser
+import requests
 import yaml
+from selectolax.lexbor import LexborHTMLParser
 
 
 class NewsIngester:
     """Fetches and normalizes news articles from RSS feeds."""
     
+    REQUEST_TIMEOUT = 30
+    USER_AGENT = "FaultLine/1.0 (+https://github.com/pranavmehta-git/fault-line)"
+    
     def __init__(self, config_path: str = "sources.yaml"):
         self.config_path = Path(config_path)
         self.config = self._load_config()
         self.articles = []
+        # URLs already merged this run (only touched on the main thread)
+        self._seen_urls: set[str] = set()
+        self._duplicates_skipped = 0
+        # Shared by every article fetched in one run (reset by fetch_all)
+        self._fetched_dt = datetime.now()
+        self._fetched_at = self._fetched_dt.isoformat()
         
     def _load_config(self) -> dict:
         """Load sources configuration."""
         with open(self.config_path) as f:
             return yaml.safe_load(f)
     
-    def fetch_all(self) -> list[dict]:
-        """Fetch articles from all enabled sources."""
-        for source in self.config.get("sources", []):
-            if not source.get("enabled", True):
-                continue
-                
-            print(f"Fetching: {source['name']}")
+    def fetch_all(self, max_workers: int = 8) -> list[dict]:
+        """Fetch articles from all enabled sources concurrently."""
+        self._fetched_dt = datetime.now()
+        self._fetched_at = self._fetched_dt.isoformat()
+        enabled = [
+            source for source in self.config.get("sources", [])
+            if source.get("enabled", True) and source.get("type") == "rss"
+        ]
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._fetch_rss, source) for source in enabled]
             
-            try:
-                if source.get("type") == "rss":
-                    articles = self._fetch_rss(source)
-                    self.articles.extend(articles)
+            # Feeds download in parallel, but results are merged on the main
+            # thread in config order so the output does not depend on timing
+            for source, future in zip(enabled, futures):
+                print(f"Fetched: {source['name']}")
+                
+                try:
+                    articles = future.result()
                     print(f"  Found {len(articles)} articles")
-            except Exception as e:
-                print(f"  Error: {e}")
+                except Exception as e:
+                    print(f"  Error: {e}")
+                    continue
+                
+                # Drop duplicates (across all feeds) as they are merged; the
+                # first source in config order keeps a cross-posted URL
+                for article in articles:
+                    if article["url"] in self._seen_urls:
+                        self._duplicates_skipped += 1
+                        continue
+                    self._seen_urls.add(article["url"])
+                    self.articles.append(article)
+        
+        if self._duplicates_skipped > 0:
+            print(f"Skipped {self._duplicates_skipped} duplicates")
                 
         return self.articles
     
     def _fetch_rss(self, source: dict) -> list[dict]:
         """Fetch and parse RSS feed."""
-        feed = feedparser.parse(source["url"])
+        # Download separately so the request has a timeout; feedparser only parses
+        response = requests.get(
+            source["url"],
+            timeout=self.REQUEST_TIMEOUT,
+            headers={"User-Agent": self.USER_AGENT},
+        )
+        response.raise_for_status()
+        
+        # Relative URIs inside summaries are dropped with the markup by
+        # _clean_html, so skip rewriting them. Sanitizing stays on: HTML
+        # titles (Atom type="html"/"xhtml") are stored as-is and end up in
+        # the dashboard.
+        feed = feedparser.parse(
+            response.content,
+            response_headers={
+                "content-type": response.headers.get("content-type", ""),
+                "content-location": response.url,
+            },
+            resolve_relative_uris=False,
+        )
         articles = []
         
         for entry in feed.entries:
@@ -73,9 +123,9 @@ class NewsIngester:
             # Parse date
             published = entry.get("published_parsed") or entry.get("updated_parsed")
             if published:
-                date = datetime(*published[:6]).isoformat()
+                date_dt = datetime(*published[:6])
             else:
-                date = datetime.now().isoformat()
+                date_dt = self._fetched_dt
             
             # Extract content
             title = entry.get("title", "")
@@ -93,10 +143,11 @@ class NewsIngester:
                 "url": url,
                 "title": title,
                 "summary": summary,
-                "date": date,
+                "date": date_dt.isoformat(),
                 "source_name": source["name"],
                 "source_url": source["url"],
-                "fetched_at": datetime.now().isoformat(),
+                "fetched_at": self._fetched_at,
+                "_date_dt": date_dt,  # In-memory only; dropped by save()
             }
             
         except Exception as e:
@@ -109,31 +160,29 @@ class NewsIngester:
         parsed = urlparse(url)
         normalized = f"{parsed.netloc}{parsed.path}"
         
-        # Hash it
-        return hashlib.sha256(normalized.encode()).hexdigest()[:16]
+        # Hash it (a 64-bit digest is plenty for a dedup key)
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
     
     def _clean_html(self, text: str) -> str:
-        """Remove HTML tags from text."""
-        clean = re.sub(r"<[^>]+>", " ", text)
-        clean = re.sub(r"\s+", " ", clean)
-        return clean.strip()
+        """Remove HTML tags and decode entities in text."""
+        if not text:
+            return ""
+        
+        # Plain-text summaries skip parser setup entirely
+        if "<" not in text and "&" not in text:
+            return " ".join(text.split())
+        
+        tree = LexborHTMLParser(text)
+        tree.strip_tags(["script", "style"])
+        clean = tree.text(separator=" ", strip=True)
+        return " ".join(clean.split())
     
     def deduplicate(self) -> list[dict]:
-        """Remove duplicate articles by URL."""
-        seen_urls = set()
-        unique = []
+        """Remove duplicate articles by URL.
         
-        for article in self.articles:
-            url = article["url"]
-            if url not in seen_urls:
-                seen_urls.add(url)
-                unique.append(article)
-                
-        removed = len(self.articles) - len(unique)
-        if removed > 0:
-            print(f"Removed {removed} duplicates")
-            
-        self.articles = unique
+        Kept for compatibility: duplicates are now skipped by fetch_all as
+        each feed's articles are merged, so this is a no-op.
+        """
         return self.articles
     
     def filter_recent(self, days: int = 30) -> list[dict]:
@@ -142,12 +191,10 @@ class NewsIngester:
         
         recent = []
         for article in self.articles:
-            try:
-                date = datetime.fromisoformat(article["date"].replace("Z", "+00:00"))
-                if date.replace(tzinfo=None) >= cutoff:
-                    recent.append(article)
-            except (ValueError, TypeError, KeyError):
-                # Keep articles with unparseable dates
+            # Normalized articles carry their parsed date; parse anything else
+            date = article.get("_date_dt") or self._parse_date(article)
+            # Keep articles with unparseable dates
+            if date is None or date >= cutoff:
                 recent.append(article)
                 
         filtered = len(self.articles) - len(recent)
@@ -157,10 +204,26 @@ class NewsIngester:
         self.articles = recent
         return self.articles
     
-    def save(self, output_path: str = "raw_articles.json"):
-        """Save articles to JSON file."""
-        with open(output_path, "w") as f:
-            json.dump({"articles": self.articles, "fetched_at": datetime.now().isoformat()}, f, indent=2)
+    def _parse_date(self, article: dict) -> Optional[datetime]:
+        """Parse an article's ISO date as naive datetime, or None if unparseable."""
+        try:
+            return datetime.fromisoformat(article["date"]).replace(tzinfo=None)
+        except (ValueError, TypeError, KeyError):
+            return None
+    
+    def save(self, output_path: str = "raw_articles.json", pretty: bool = False):
+        """Save articles to JSON file (compact unless pretty is set)."""
+        # Drop in-memory helper fields such as _date_dt
+        articles = [
+            {key: value for key, value in article.items() if not key.startswith("_")}
+            for article in self.articles
+        ]
+        payload = {"articles": articles, "fetched_at": datetime.now().isoformat()}
+        with open(output_path, "w", encoding="utf-8") as f:
+            if pretty:
+                json.dump(payload, f, indent=2, ensure_ascii=False)
+            else:
+                json.dump(payload, f, separators=(",", ":"), ensure_ascii=False)
         print(f"Saved {len(self.articles)} articles to {output_path}")
 
 
@@ -177,11 +240,10 @@ def main():
     print("Fault Line - News Ingestion")
     print("=" * 50)
     
-    # Fetch from all sources
+    # Fetch from all sources (duplicates are skipped as they are fetched)
     ingester.fetch_all()
     
     # Clean up
-    ingester.deduplicate()
     ingester.filter_recent(days=30)
     
     # Save
@@ -4,15 +4,26 @@ Recalculate current fragility scores based on events within the 180-day decay wi
 This script reads events.json and updates scores.json to be consistent.
 """
 
-import json
-from datetime import datetime, timedelta
+import argparse
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 
+import orjson
+
 # Configuration
 DECAY_WINDOW_DAYS = 180
 LABS = ["openai", "anthropic", "deepmind", "xai", "meta"]
 DIMENSIONS = ["compute_chips", "cloud", "policy", "demand", "resilience"]
 
+# Paths
+BASE_PATH = Path(__file__).parent.parent
+EVENTS_PATH = BASE_PATH / "docs" / "data" / "events.json"
+SCORES_PATH = BASE_PATH / "docs" / "data" / "scores.json"
+EVENTS_COUNT_PATH = BASE_PATH / "pipeline" / "events_count.txt"
+
 # Checklist item definitions
 CHECKLIST_ITEMS = {
     "A1": {"dimension": "compute_chips", "points": 1},
@@ -27,63 +38,80 @@ CHECKLIST_ITEMS = {
     "E2": {"dimension": "resilience", "points": -1},
 }
 
+# Checklist items (and their points) per dimension, built once
+DIM_TO_ITEMS = {
+    dimension: frozenset(item_id for item_id, info in CHECKLIST_ITEMS.items()
+                         if info["dimension"] == dimension)
+    for dimension in DIMENSIONS
+}
+DIM_POINTS = {
+    dimension: {item_id: CHECKLIST_ITEMS[item_id]["points"] for item_id in items}
+    for dimension, items in DIM_TO_ITEMS.items()
+}
+
 
 def load_events(events_path: Path) -> list[dict]:
     """Load events from JSON file."""
-    with open(events_path, "r") as f:
-        data = json.load(f)
+    with open(events_path, "rb") as f:
+        data = orjson.loads(f.read())
     return data.get("events", [])
 
 
 def load_scores(scores_path: Path) -> dict:
     """Load existing scores to get previous values for trend calculation."""
-    with open(scores_path, "r") as f:
-        return json.load(f)
-
-
-def get_events_in_window(events: list[dict], reference_date: datetime, window_days: int = DECAY_WINDOW_DAYS) -> list[dict]:
-    """Filter events to only those within the decay window."""
-    cutoff_date = reference_date - timedelta(days=window_days)
-
-    in_window = []
-    for event in events:
-        try:
-            event_date = datetime.strptime(event["date"], "%Y-%m-%d")
-            if cutoff_date <= event_date <= reference_date:
-                in_window.append(event)
-        except (KeyError, ValueError):
-            continue
-
-    return in_window
+    with open(scores_path, "rb") as f:
+        return orjson.loads(f.read())
 
 
-def calculate_lab_score(lab_id: str, events: list[dict]) -> dict:
-    """Calculate fragility score for a single lab based on events."""
-    # Filter events for this lab
-    lab_events = [e for e in events if e.get("lab") == lab_id]
+def _is_valid_date(value: str) -> bool:
+    """Check that value is a real YYYY-MM-DD date, as strptime("%Y-%m-%d") did."""
+    # The shape check rules out timestamps and ISO week dates (2025-W01-1),
+    # which fromisoformat would otherwise accept
+    if len(value) != 10 or value[4] != "-" or value[7] != "-":
+        return False
+    try:
+        date.fromisoformat(value)
+    except ValueError:  # e.g. 2025-13-01, 2025-02-30 or 2025-12-3x
+        return False
+    return True
 
-    # Track which checklist items are triggered
-    triggered_items = set()
-
-    for event in lab_events:
-        items = event.get("checklist_items_affected", [])
-        for item in items:
-            triggered_items.add(item)
 
+def get_events_in_window(events: list[dict], reference_date: datetime, window_days: int = DECAY_WINDOW_DAYS) -> list[dict]:
+    """Filter events to only those within the decay window."""
+    # YYYY-MM-DD strings sort chronologically, so compare them without parsing.
+    # The window is the window_days days after the cutoff day, up to and
+    # including the reference day. Only dates already in range are
+    # validated; missing, non-string, malformed or impossible dates
+    # (including timestamps) are skipped, as they were with strptime.
+    cutoff_str = (reference_date - timedelta(days=window_days)).strftime("%Y-%m-%d")
+    reference_str = reference_date.strftime("%Y-%m-%d")
+
+    return [
+        event for event in events
+        if isinstance(event_date := event.get("date"), str)
+        and cutoff_str < event_date <= reference_str
+        and _is_valid_date(event_date)
+    ]
+
+
+@lru_cache(maxsize=64)
+def _score_from_triggered(triggered_items: frozenset) -> dict:
+    """Calculate dimension breakdown and total score from triggered checklist items.
+
+    Results are cached and shared between callers, so treat them as read-only.
+    """
     # Calculate dimension scores
     breakdown = {}
     for dimension in DIMENSIONS:
-        dim_items = [item_id for item_id, info in CHECKLIST_ITEMS.items()
-                     if info["dimension"] == dimension]
-
-        triggered_in_dim = [item for item in dim_items if item in triggered_items]
+        # Sorted for stable output, matching compute_historical_scores
+        triggered_in_dim = sorted(triggered_items & DIM_TO_ITEMS[dimension])
 
         if dimension == "resilience":
             # Resilience items have negative points (reduce fragility)
             # Score represents how many resilience items are triggered (max 2)
             score = len(triggered_in_dim)
         else:
-            score = sum(CHECKLIST_ITEMS[item]["points"] for item in triggered_in_dim)
+            score = sum(DIM_POINTS[dimension][item] for item in triggered_in_dim)
 
         breakdown[dimension] = {
             "score": score,
@@ -101,19 +129,27 @@ def calculate_lab_score(lab_id: str, events: list[dict]) -> dict:
     )
 
     # Clamp to 0-10
-    total_score = max(0, min(10, raw_total))
+    total_score = 0 if raw_total <= 0 else (10 if raw_total >= 10 else raw_total)
+
+    return {
+        "total_score": total_score,
+        "breakdown": breakdown,
+    }
+
+
+def calculate_lab_score(lab_id: str, lab_events: list[dict]) -> dict:
+    """Calculate fragility score for a single lab from that lab's events."""
+    # Track which checklist items are triggered (hashable, for the score cache)
+    triggered_items = frozenset().union(
+        *(event.get("checklist_items_affected") or () for event in lab_events)
+    )
 
     # Get last event date
-    if lab_events:
-        dates = [e["date"] for e in lab_events]
-        last_event_date = max(dates)
-    else:
-        last_event_date = None
+    last_event_date = max((e["date"] for e in lab_events), default=None)
 
     return {
         "lab_id": lab_id,
-        "total_score": total_score,
-        "breakdown": breakdown,
+        **_score_from_triggered(triggered_items),
         "events_count": len(lab_events),
         "last_event_date": last_event_date,
         "triggered_items": list(triggered_items)
@@ -122,43 +158,48 @@ def calculate_lab_score(lab_id: str, events: list[dict]) -> dict:
 
 def calculate_trend(current_score: int, previous_score: int) -> str:
     """Determine trend based on score change."""
-    if current_score < previous_score:
-        return "improving"  # Lower fragility is better
-    elif current_score > previous_score:
-        return "worsening"
-    else:
-        return "stable"
+    # Sign of the change: -1, 0 or 1 (lower fragility is better)
+    sign = (current_score > previous_score) - (current_score < previous_score)
+    return ("improving", "stable", "worsening")[sign + 1]
 
 
-def main():
-    # Paths
-    base_path = Path(__file__).parent.parent
-    events_path = base_path / "docs" / "data" / "events.json"
-    scores_path = base_path / "docs" / "data" / "scores.json"
+def main(pretty: bool = False) -> tuple[int, dict]:
+    """Recalculate scores.json; returns the total event count and the scores written."""
+    # Single run timestamp, used for the decay window and last_updated
+    run_ts = datetime.now(timezone.utc)
 
     # Load data
-    events = load_events(events_path)
-    old_scores = load_scores(scores_path)
+    events = load_events(EVENTS_PATH)
+    total_events = len(events)
+    old_scores = load_scores(SCORES_PATH)
 
     # Create lookup for old scores
     old_score_lookup = {s["lab_id"]: s for s in old_scores.get("scores", [])}
 
     # Reference date (today)
-    reference_date = datetime.now()
+    reference_date = run_ts
 
     # Get events in decay window
     active_events = get_events_in_window(events, reference_date)
 
+    # Leave the count for update_metadata so it need not re-parse events.json
+    EVENTS_COUNT_PATH.write_text(str(total_events))
+
     print(f"Reference date: {reference_date.strftime('%Y-%m-%d')}")
     print(f"Decay window: {DECAY_WINDOW_DAYS} days")
-    print(f"Total events: {len(events)}")
+    print(f"Total events: {total_events}")
     print(f"Events in window: {len(active_events)}")
     print()
 
+    # Partition events by lab in one pass
+    events_by_lab = defaultdict(list)
+    for event in active_events:
+        events_by_lab[event.get("lab")].append(event)
+
     # Calculate scores for each lab
     lab_scores = []
     for lab_id in LABS:
-        score_data = calculate_lab_score(lab_id, active_events)
+        score_data = calculate_lab_score(lab_id, events_by_lab[lab_id])
 
         # Get previous score for trend calculation
         old_data = old_score_lookup.get(lab_id, {})
@@ -175,8 +216,10 @@ def main():
         print(f"  Events in window: {score_data['events_count']}")
         print()
 
-    # Sort by score (descending) for ranking
-    lab_scores.sort(key=lambda x: (-x["total_score"], x["lab_id"]))
+    # Sort by score (descending) for ranking, ties by lab_id; list.sort is
+    # stable (also with reverse=True), so two C-keyed passes suffice
+    lab_scores.sort(key=itemgetter("lab_id"))
+    lab_scores.sort(key=itemgetter("total_score"), reverse=True)
 
     # Assign ranks
     for i, score_data in enumerate(lab_scores):
@@ -186,14 +229,15 @@ def main():
 
     # Build output
     output = {
-        "last_updated": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "last_updated": run_ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
         "scoring_version": "1.0.0",
         "scores": lab_scores
     }
 
-    # Write updated scores
-    with open(scores_path, "w") as f:
-        json.dump(output, f, indent=2)
+    # Write updated scores (serialized to one buffer, written in one call;
+    # compact unless pretty is set)
+    option = orjson.OPT_INDENT_2 if pretty else 0
+    SCORES_PATH.write_bytes(orjson.dumps(output, option=option | orjson.OPT_APPEND_NEWLINE))
 
     print("=" * 50)
     print("Updated scores.json")
@@ -201,6 +245,10 @@ def main():
     for score_data in lab_scores:
         print(f"  {score_data['rank']}. {score_data['lab_id']}: {score_data['total_score']}")
 
+    return total_events, output
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pretty", action="store_true", help="indent scores.json for debugging")
+    main(pretty=parser.parse_args().pretty)
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Fault Line - Pipeline Runner
+Runs every pipeline step in one process, in the same order as the workflow.
+The event count from recalculate_scores is handed straight to update_metadata,
+so events.json is not parsed again just to count it.
+"""
+
+import argparse
+
+import classify
+import compute_historical_scores
+import ingest
+import recalculate_scores
+import update_metadata
+
+
+def main(pretty: bool = False):
+    """Run ingestion, classification, scoring and metadata update."""
+    ingest.main()
+    classify.main()
+    total_events, _ = recalculate_scores.main(pretty=pretty)
+    compute_historical_scores.main()
+    update_metadata.update_metadata(pretty=pretty, total_events=total_events)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pretty", action="store_true", help="indent scores.json and metadata.json for debugging")
+    main(pretty=parser.parse_args().pretty)
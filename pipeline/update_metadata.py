@@ -4,24 +4,28 @@ Fault Line - Metadata Update Script
 Updates metadata.json with current timestamps and pipeline statistics.
 """
 
-import json
-from datetime import datetime, timezone
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Optional
 
+import orjson
 
-def get_next_scheduled_run() -> str:
+# Paths
+SCRIPT_DIR = Path(__file__).parent
+METADATA_PATH = SCRIPT_DIR.parent / "docs" / "data" / "metadata.json"
+EVENTS_PATH = SCRIPT_DIR.parent / "docs" / "data" / "events.json"
+RAW_ARTICLES_PATH = SCRIPT_DIR / "raw_articles.json"
+EVENTS_COUNT_PATH = SCRIPT_DIR / "events_count.txt"
+
+
+def get_next_scheduled_run(now: datetime) -> str:
     """Calculate next scheduled run time based on cron: '0 */6 * * *' (every 6 hours)."""
-    now = datetime.now(timezone.utc)
-    # Find next 6-hour boundary (0, 6, 12, 18)
-    current_hour = now.hour
-    next_hour = ((current_hour // 6) + 1) * 6
-
-    if next_hour >= 24:
-        # Roll over to next day
-        next_run = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        next_run = next_run.replace(day=now.day + 1)
-    else:
-        next_run = now.replace(hour=next_hour, minute=0, second=0, microsecond=0)
+    # Find next 6-hour boundary (0, 6, 12, 18); timedelta handles day,
+    # month and year rollover
+    hour_start = now.replace(minute=0, second=0, microsecond=0)
+    next_run = hour_start + timedelta(hours=6 - now.hour % 6)
 
     return next_run.strftime("%Y-%m-%dT%H:%M:%SZ")
 
@@ -31,59 +35,67 @@ def get_source_stats(raw_articles_path: Path) -> list[dict]:
     if not raw_articles_path.exists():
         return []
 
-    with open(raw_articles_path) as f:
-        data = json.load(f)
+    with open(raw_articles_path, "rb") as f:
+        data = orjson.loads(f.read())
 
     articles = data.get("articles", [])
 
-    # Count articles per source
-    source_counts = {}
-    source_urls = {}
-    for article in articles:
-        source_name = article.get("source_name", "Unknown")
-        source_url = article.get("source_url", "")
-        source_counts[source_name] = source_counts.get(source_name, 0) + 1
-        source_urls[source_name] = source_url
+    # Count articles per source (keeping the last URL seen for each)
+    source_counts = Counter(article.get("source_name", "Unknown") for article in articles)
+    source_urls = {
+        article.get("source_name", "Unknown"): article.get("source_url", "")
+        for article in articles
+    }
 
     # Format as list
-    sources = []
-    for name, count in source_counts.items():
-        sources.append({
+    return [
+        {
             "name": name,
             "url": source_urls.get(name, ""),
             "status": "ok",
             "articles_found": count
-        })
+        }
+        for name, count in source_counts.items()
+    ]
+
+
+def count_events(events_path: Path, count_path: Path) -> int:
+    """Count events, preferring the count left by recalculate_scores.py.
 
-    return sources
+    The count file is only trusted if it is at least as new as events.json.
+    """
+    if count_path.exists() and count_path.stat().st_mtime >= events_path.stat().st_mtime:
+        try:
+            return int(count_path.read_text())
+        except ValueError:
+            pass  # Fall back to parsing events.json
 
+    with open(events_path, "rb") as f:
+        data = orjson.loads(f.read())
+    return len(data.get("events", []))
 
-def get_event_stats(events_path: Path, previous_count: int) -> tuple[int, int]:
-    """Get event processing statistics."""
-    if not events_path.exists():
-        return 0, 0
 
-    with open(events_path) as f:
-        data = json.load(f)
+def get_event_stats(events_path: Path, previous_count: int, count_path: Path,
+                    total_events: Optional[int] = None) -> tuple[int, int]:
+    """Get event processing statistics, counting events unless total_events is given."""
+    if total_events is None:
+        if not events_path.exists():
+            return 0, 0
+        total_events = count_events(events_path, count_path)
 
-    events = data.get("events", [])
-    total_events = len(events)
     events_added = max(0, total_events - previous_count)
 
     return total_events, events_added
 
 
-def update_metadata():
-    """Update metadata.json with current run information."""
-    script_dir = Path(__file__).parent
-    metadata_path = script_dir.parent / "docs" / "data" / "metadata.json"
-    events_path = script_dir.parent / "docs" / "data" / "events.json"
-    raw_articles_path = script_dir / "raw_articles.json"
+def update_metadata(pretty: bool = False, total_events: Optional[int] = None):
+    """Update metadata.json with current run information (compact unless pretty is set)."""
+    run_ts = datetime.now(timezone.utc)
 
     # Load existing metadata
-    if metadata_path.exists():
-        with open(metadata_path) as f:
-            metadata = json.load(f)
+    if METADATA_PATH.exists():
+        with open(METADATA_PATH, "rb") as f:
+            metadata = orjson.loads(f.read())
     else:
         metadata = {}
 
@@ -91,17 +103,19 @@ def update_metadata():
     previous_event_count = metadata.get("events_processed", 0)
 
     # Update timestamps
-    metadata["last_run"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-    metadata["next_scheduled_run"] = get_next_scheduled_run()
+    metadata["last_run"] = run_ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+    metadata["next_scheduled_run"] = get_next_scheduled_run(run_ts)
     metadata["run_status"] = "success"
 
     # Update source stats
-    sources = get_source_stats(raw_articles_path)
+    sources = get_source_stats(RAW_ARTICLES_PATH)
     if sources:
         metadata["sources_checked"] = sources
 
     # Update event stats
-    events_processed, events_added = get_event_stats(events_path, previous_event_count)
+    events_processed, events_added = get_event_stats(
+        EVENTS_PATH, previous_event_count, EVENTS_COUNT_PATH, total_events
+    )
     metadata["events_processed"] = events_processed
     metadata["events_added"] = events_added
     metadata["events_updated"] = 0  # Not currently tracked
@@ -113,8 +127,8 @@ def update_metadata():
         metadata["scores_changed"] = []
 
     # Save updated metadata
-    with open(metadata_path, "w") as f:
-        json.dump(metadata, f, indent=2)
+    option = orjson.OPT_INDENT_2 if pretty else 0
+    METADATA_PATH.write_bytes(orjson.dumps(metadata, option=option | orjson.OPT_APPEND_NEWLINE))
 
     print("=" * 50)
     print("Metadata Updated")
@@ -128,4 +142,6 @@ def update_metadata():
 
 
 if __name__ == "__main__":
-    update_metadata()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pretty", action="store_true", help="indent metadata.json for debugging")
+    update_metadata(pretty=parser.parse_args().pretty)